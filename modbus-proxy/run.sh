@@ -224,6 +224,7 @@ EOF
     # Add optional parameters if set
     TIMEOUT_VAL=$(bashio::config "modbus_devices[${DEVICE_COUNT}].timeout" "" 2>/dev/null || echo "")
     CONNECTION_TIME_VAL=$(bashio::config "modbus_devices[${DEVICE_COUNT}].connection_time" "" 2>/dev/null || echo "")
+    MAX_INFLIGHT_VAL=$(bashio::config "modbus_devices[${DEVICE_COUNT}].max_inflight" "" 2>/dev/null || echo "")
     
     if [ -n "$TIMEOUT_VAL" ] && [ "$TIMEOUT_VAL" != "null" ]; then
         echo "      timeout: $TIMEOUT_VAL" >> "$CONFIG_PATH"
@@ -233,6 +234,10 @@ EOF
         echo "      connection_time: $CONNECTION_TIME_VAL" >> "$CONFIG_PATH"
     fi
     
+    if [ -n "$MAX_INFLIGHT_VAL" ] && [ "$MAX_INFLIGHT_VAL" != "null" ]; then
+        echo "      max_inflight: $MAX_INFLIGHT_VAL" >> "$CONFIG_PATH"
+    fi
+    
     # Add unit_id_remapping if configured
     UNIT_ID_REMAPPING=$(bashio::config "modbus_devices[${DEVICE_COUNT}].unit_id_remapping" "" 2>/dev/null || echo "")
     if [ -n "$UNIT_ID_REMAPPING" ] && [ "$UNIT_ID_REMAPPING" != "null" ]; then
@@ -257,6 +262,18 @@ EOF
         fi
     fi
     
+    # Add socket tuning if configured
+    TCP_NODELAY_VAL=$(bashio::config "modbus_devices[${DEVICE_COUNT}].tcp_nodelay" "" 2>/dev/null || echo "")
+    WRITE_BUFFER_HIGH_VAL=$(bashio::config "modbus_devices[${DEVICE_COUNT}].write_buffer_high" "" 2>/dev/null || echo "")
+    
+    if [ -n "$TCP_NODELAY_VAL" ] && [ "$TCP_NODELAY_VAL" != "null" ]; then
+        echo "    tcp_nodelay: $TCP_NODELAY_VAL" >> "$CONFIG_PATH"
+    fi
+    
+    if [ -n "$WRITE_BUFFER_HIGH_VAL" ] && [ "$WRITE_BUFFER_HIGH_VAL" != "null" ]; then
+        echo "    write_buffer_high: $WRITE_BUFFER_HIGH_VAL" >> "$CONFIG_PATH"
+    fi
+    
     # Add listen configuration
     cat >> "$CONFIG_PATH" <<EOF
     listen:
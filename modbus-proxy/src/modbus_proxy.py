@@ -7,19 +7,41 @@
 # Distributed under the GPLv3 license. See LICENSE for more info.
 
 
+import sys
+import array
 import asyncio
 import pathlib
+import collections
 import argparse
 import warnings
 import contextlib
+import importlib.util
 import logging.config
 import os
 import stat
+import socket
+import struct
 from urllib.parse import urlparse
 
-__version__ = "0.8.5"
+# Serial support is only needed for rtu:// devices
+try:
+    import serial_asyncio
+    _HAS_SERIAL_ASYNCIO = True
+except ImportError:
+    _HAS_SERIAL_ASYNCIO = False
+try:
+    import serial
+    _HAS_SERIAL = True
+except ImportError:
+    _HAS_SERIAL = False
+
+__version__ = "0.9.0"
 
 # Changelog:
+# 0.9.0 - Single request worker per device with optional Modbus TCP pipelining (max_inflight)
+#         - Buffered protocol framing of device replies, batched writes
+#         - Client requests read and answered by two pumps, replies in request order
+#         - tcp_nodelay / write_buffer_high socket options, uvloop event loop by default
 # 0.8.5 - Normalize RTU device path: ensure absolute path and resolve symlinks 
 # 0.8.4 - Fix RTU over TCP communication issue, improve format detection
 #         - Fixed assumption that HA always expects TCP format responses
@@ -51,6 +73,58 @@ DEFAULT_LOG_CONFIG = {
 }
 
 log = logging.getLogger("modbus-proxy")
+# Shared by all client connections: a child logger per peer would be
+# registered with the logging manager, and kept, for every connection
+CLIENT_LOG = log.getChild("Client")
+
+# Precompiled MBAP header layouts: length field alone, the 6 bytes up to
+# the unit ID, and the full 7 bytes
+_MBAP_LEN = struct.Struct(">H")
+_MBAP_HEAD = struct.Struct(">HHH")
+_MBAP_FULL = struct.Struct(">HHHB")
+
+# Bytes of an RTU reply after its first three (slave ID, function code and
+# one data byte), CRC included; None where the third byte is a byte count.
+# Unknown functions are read as carrying no data.
+_RTU_TAIL = {
+    0x01: None, 0x02: None, 0x03: None, 0x04: None,  # read functions
+    0x05: 5, 0x06: 5, 0x0F: 5, 0x10: 5,  # writes echo address and value/quantity
+}
+
+# Largest Modbus TCP ADU: 7 byte MBAP header + 253 byte PDU
+_MAX_ADU = 260
+# Unit ID lookup table that maps every ID to itself
+_IDENTITY_MAP = bytes(range(256))
+# Requests a single client may have in flight before its reads pause
+_CLIENT_PIPELINE = 16
+
+
+def _unpack_bits(data, limit):
+    """Return the first `limit` coil bits of data, LSB first within each byte"""
+    value = int.from_bytes(data, "little")
+    return [(value >> bit) & 1 for bit in range(min(limit, len(data) * 8))]
+
+
+def _unpack_registers(data):
+    """Decode big-endian 16-bit registers (a trailing odd byte is ignored)"""
+    registers = array.array("H", data[:len(data) & ~1])
+    if sys.byteorder == "little":
+        registers.byteswap()
+    return registers.tolist()
+
+
+def _crc16_table():
+    """CRC-16/Modbus (poly 0xA001, reflected) value of each single byte"""
+    table = []
+    for byte in range(256):
+        crc = byte
+        for _ in range(8):
+            crc = (crc >> 1) ^ 0xA001 if crc & 1 else crc >> 1
+        table.append(crc)
+    return tuple(table)
+
+
+_CRC16_TABLE = _crc16_table()
 
 
 def parse_url(url):
@@ -63,12 +137,168 @@ def parse_url(url):
     return result
 
 
+class ModbusProtocol(asyncio.BufferedProtocol):
+    """Modbus TCP device connection framing replies as they are received
+
+    Replaces the StreamReader/StreamWriter pair for TCP devices: the socket
+    is read straight into a receive buffer allocated once per connection and
+    complete MBAP frames are cut out of it, instead of going through
+    readexactly(). It offers the small subset of the stream API that
+    Connection uses, plus read_frame().
+    """
+
+    def __init__(self):
+        self.transport = None
+        self._buffer = bytearray(4 * _MAX_ADU)
+        self._view = memoryview(self._buffer)
+        self._start = 0  # first unconsumed byte
+        self._end = 0  # end of received data
+        self._frames = collections.deque()
+        self._eof = False
+        self._exception = None
+        self._paused = False
+        self._read_waiter = None
+        self._drain_waiter = None
+        self._closed = asyncio.get_running_loop().create_future()
+
+    def connection_made(self, transport):
+        self.transport = transport
+
+    def get_buffer(self, sizehint):
+        if self._start:
+            # Move the partial frame left over to the front of the buffer
+            pending = self._end - self._start
+            self._buffer[:pending] = self._view[self._start:self._end]
+            self._start, self._end = 0, pending
+        return self._view[self._end:]
+
+    def buffer_updated(self, nbytes):
+        buf, start, end = self._buffer, self._start, self._end + nbytes
+        while end - start >= 6:
+            size = _MBAP_LEN.unpack_from(buf, start + 4)[0]
+            # The length covers the unit ID and at least a function code
+            if size < 2 or 6 + size > _MAX_ADU:
+                self._exception = ValueError(f"invalid MBAP length {size}")
+                self.transport.abort()
+                return
+            if start + 6 + size > end:
+                break
+            self._frames.append(buf[start:start + 6 + size])
+            start += 6 + size
+        frames_added = start != self._start
+        self._start, self._end = start, end
+        if frames_added:
+            self._wakeup_reader()
+
+    def eof_received(self):
+        self._eof = True
+        self._wakeup_reader()
+
+    def connection_lost(self, exc):
+        self._eof = True
+        if exc is not None:
+            self._exception = exc
+        self._wakeup_reader()
+        self.resume_writing()
+        if not self._closed.done():
+            self._closed.set_result(None)
+
+    def pause_writing(self):
+        self._paused = True
+
+    def resume_writing(self):
+        self._paused = False
+        waiter, self._drain_waiter = self._drain_waiter, None
+        if waiter is not None and not waiter.done():
+            waiter.set_result(None)
+
+    def _wakeup_reader(self):
+        waiter, self._read_waiter = self._read_waiter, None
+        if waiter is not None and not waiter.done():
+            waiter.set_result(None)
+
+    async def read_frame(self):
+        while not self._frames:
+            if self._exception is not None:
+                raise self._exception
+            if self._eof:
+                partial = bytes(self._view[self._start:self._end])
+                expected = 6
+                if len(partial) >= 6:
+                    expected += _MBAP_LEN.unpack_from(partial, 4)[0]
+                raise asyncio.IncompleteReadError(partial, expected)
+            self._read_waiter = asyncio.get_running_loop().create_future()
+            await self._read_waiter
+        return self._frames.popleft()
+
+    def at_eof(self):
+        return self._eof and not self._frames
+
+    def write(self, data):
+        self.transport.write(data)
+
+    def writelines(self, frames):
+        self.transport.writelines(frames)
+
+    async def drain(self):
+        if self._exception is not None:
+            raise self._exception
+        if self.transport.is_closing():
+            # Let connection_lost() run, as StreamWriter.drain() does
+            await asyncio.sleep(0)
+        if self._paused:
+            self._drain_waiter = asyncio.get_running_loop().create_future()
+            await self._drain_waiter
+
+    def is_closing(self):
+        return self.transport.is_closing()
+
+    def close(self):
+        self.transport.close()
+
+    async def wait_closed(self):
+        await self._closed
+
+    def get_extra_info(self, name, default=None):
+        return self.transport.get_extra_info(name, default)
+
+
+class PeerLogAdapter(logging.LoggerAdapter):
+    """Prefix the records of a shared logger with the connection peer"""
+
+    def __init__(self, logger, peer):
+        super().__init__(logger)
+        self._prefix = "[%s] " % peer
+        # A message is only %-formatted when it has args; the peer's own
+        # '%' (IPv6 scope ids) must then be escaped
+        self._escaped_prefix = "[%s] " % peer.replace("%", "%%")
+
+    def log(self, level, msg, *args, **kwargs):
+        if self.isEnabledFor(level):
+            prefix = self._escaped_prefix if args else self._prefix
+            # Report the caller, not this frame, as the record's origin
+            kwargs["stacklevel"] = kwargs.get("stacklevel", 1) + 1
+            self.logger.log(level, prefix + msg, *args, **kwargs)
+
+
 class Connection:
-    def __init__(self, name, reader, writer):
+    # Device kind and serial streams, set by ModBus; plain TCP otherwise
+    modbus_type = None
+    serial_reader = serial_writer = None
+    serial = None
+    # Per-frame debug formats; ModBus names the device in them
+    _request_fmt = "→ Request: %d bytes"
+    _reply_fmt = "← Response: %d bytes"
+
+    def __init__(self, name, reader, writer, logger=None):
         self.name = name
         self.reader = reader
         self.writer = writer
-        self.log = log.getChild(name)
+        self.log = log.getChild(name) if logger is None else logger
+        # Snapshot once: logging is configured before any connection exists
+        self._debug = self.log.isEnabledFor(logging.DEBUG)
+        # Outgoing TCP frames waiting for the next _flush_tcp
+        self._out_q = []
 
     async def __aenter__(self):
         return self
@@ -78,16 +308,15 @@ class Connection:
 
     @property
     def opened(self):
-        if hasattr(self, 'modbus_type') and self.modbus_type == 'rtu':
+        if self.modbus_type == 'rtu':
             # Check RTU/Serial connection
-            if hasattr(self, 'serial_writer'):
+            if self.serial_writer is not None:
                 return (
-                    self.serial_writer is not None
-                    and not self.serial_writer.is_closing()
+                    not self.serial_writer.is_closing()
                     and not self.serial_reader.at_eof()
                 )
-            elif hasattr(self, 'serial'):
-                return self.serial is not None and self.serial.is_open
+            elif self.serial is not None:
+                return self.serial.is_open
             return False
         else:
             # Check TCP connection
@@ -98,9 +327,11 @@ class Connection:
             )
 
     async def close(self):
-        if hasattr(self, 'modbus_type') and self.modbus_type == 'rtu':
+        # Frames still queued were meant for the stream being closed
+        self._out_q = []
+        if self.modbus_type == 'rtu':
             # Close RTU/Serial connection
-            if hasattr(self, 'serial_writer'):
+            if self.serial_writer is not None:
                 self.log.info("closing RTU connection...")
                 try:
                     self.serial_writer.close()
@@ -112,7 +343,7 @@ class Connection:
                 finally:
                     self.serial_reader = None
                     self.serial_writer = None
-            elif hasattr(self, 'serial'):
+            elif self.serial is not None:
                 self.log.info("closing RTU connection...")
                 try:
                     self.serial.close()
@@ -137,23 +368,57 @@ class Connection:
                 self.writer = None
 
     async def _write(self, data):
-        if hasattr(self, 'modbus_type') and self.modbus_type == 'rtu':
+        if self.modbus_type == 'rtu':
             # RTU/Serial write
-            if hasattr(self, 'serial_writer'):
+            if self.serial_writer is not None:
                 # Async serial
-                self.log.debug(f"[RTU:{self.device}] → Request: %d bytes", len(data))
+                if self._debug:
+                    self.log.debug(self._request_fmt, len(data))
                 self.serial_writer.write(data)
                 await self.serial_writer.drain()
-            elif hasattr(self, 'serial'):
+            elif self.serial is not None:
                 # Sync serial fallback
-                self.log.debug(f"[RTU:{self.device}] → Request: %d bytes", len(data))
+                if self._debug:
+                    self.log.debug(self._request_fmt, len(data))
                 self.serial.write(data)
                 self.serial.flush()
+            else:
+                raise ConnectionError("RTU device is not open")
         else:
             # TCP write
-            self.log.debug(f"[TCP:{self.modbus_host}:{self.modbus_port}] → Request: %d bytes", len(data))
-            self.writer.write(data)
-            await self.writer.drain()
+            if self._debug:
+                self.log.debug(self._request_fmt, len(data))
+            await self._write_tcp(data)
+
+    async def _write_tcp(self, data):
+        """Write a frame on the TCP stream, shared by device and client side"""
+        self._out_q.append(data)
+        await self._flush_tcp()
+
+    async def _flush_tcp(self):
+        """Write the queued frames, then wait for the transport to take them
+
+        Callers with more frames ready queue them in _out_q first so that
+        they go out in one writelines() call (a single sendmsg on
+        Python >= 3.12). The device side only does so when pipelining is
+        enabled, see ModBus._process_requests().
+        """
+        frames, self._out_q = self._out_q, []
+        writer = self.writer
+        if writer is None or writer.is_closing():
+            raise ConnectionError(f"connection closed, {len(frames)} frame(s) not sent")
+        if frames:
+            writer.writelines(frames)
+        await writer.drain()
+
+    async def flush(self):
+        try:
+            await self._flush_tcp()
+        except Exception as error:
+            self.log.error("writting error: %r", error)
+            await self.close()
+            return False
+        return True
 
     async def write(self, data):
         try:
@@ -167,62 +432,47 @@ class Connection:
     async def _read(self):
         """Read ModBus TCP message from server ie response"""
         # Handle Modbus TCP, RTU and ASCII
-        if hasattr(self, 'modbus_type') and ( self.modbus_type == 'rtu' or self.modbus_type == 'rtutcp'):
+        if self.modbus_type == 'rtu' or self.modbus_type == 'rtutcp':
             # RTU/Serial Modbus - different protocol
             return await self._read_rtu()
         else:
-            # TCP Modbus
-            header = await self.reader.readexactly(6)
-            size = int.from_bytes(header[4:], "big")
-            reply = header + await self.reader.readexactly(size)
-            
-            self.log.debug(f"[TCP:{self.modbus_host}:{self.modbus_port}] ← Response: %d bytes", len(reply))
+            # TCP Modbus, framed by ModbusProtocol
+            reply = await self.reader.read_frame()
             
             # Enhanced debug logging for modbus data
-            if self.log.isEnabledFor(logging.DEBUG) and len(reply) >= 7:
-                self._log_modbus_message(reply, "received")
+            if self._debug:
+                self.log.debug(self._reply_fmt, len(reply))
+                if len(reply) >= 7:
+                    self._log_modbus_message(reply, "received")
             
             return reply
     
     async def _read_rtu(self):
         """Read ModBus RTU message from server ie response"""
         # RTU protocol: [slave_id][function_code][data][crc_low][crc_high]
-        # We need to read byte by byte to detect frame boundaries
-        import struct
+        # The first three bytes tell how long the rest of the frame is
         
         # Use appropriate reader based on connection type
-        reader = self.serial_reader if hasattr(self, 'serial_reader') else self.reader
+        reader = self.serial_reader if self.serial_reader is not None else self.reader
         
-        # Read first byte (slave ID)
-        slave_id = await reader.readexactly(1)
-        
-        # Read function code
-        function_code = await reader.readexactly(1)
-        
-        # Read data based on function code
-        data = b''
-        if function_code[0] in [0x01, 0x02, 0x03, 0x04]:  # Read functions
-            # Read byte count, then (address (2 bytes) + value (2 bytes)) times byte count/4 
-            byte_count = await reader.readexactly(1)
-            data = byte_count + await reader.readexactly(byte_count[0])
-        elif function_code[0] in [0x05, 0x06, 0x0F, 0x10]:  # Write single, Write multiple
-            # Read address (2 bytes) + value (2 bytes)
-            data = await reader.readexactly(4)
-        
-        # Read CRC (2 bytes)
-        crc = await reader.readexactly(2)
-        
-        # Combine into RTU frame
-        rtu_frame = slave_id + function_code + data + crc
-
-        if hasattr(self, 'modbus_type') and self.modbus_type == 'rtu':
-            self.log.debug(f"[RTU:{self.device}] ← Response: %d bytes", len(rtu_frame))
+        head = await reader.readexactly(3)
+        function_code = head[1]
+        if function_code & 0x80:
+            # Exception reply: the third byte is the exception code
+            tail = 2
         else:
-            self.log.debug(f"[RTUoverTCP:{self.modbus_host}:{self.modbus_port}] ← Response: %d bytes", len(rtu_frame))
-        
+            tail = _RTU_TAIL.get(function_code, 1)
+            if tail is None:
+                # Read functions: the third byte is the data byte count
+                tail = head[2] + 2
+        # One allocation, and a bytearray the reply transforms can remap in place
+        rtu_frame = bytearray().join((head, await reader.readexactly(tail)))
+
         # Enhanced debug logging for RTU data
-        if self.log.isEnabledFor(logging.DEBUG) and len(rtu_frame) >= 4:
-            self._log_rtu_message(rtu_frame, "received")
+        if self._debug:
+            self.log.debug(self._reply_fmt, len(rtu_frame))
+            if len(rtu_frame) >= 4:
+                self._log_rtu_message(rtu_frame, "received")
         
         return rtu_frame
 
@@ -230,31 +480,39 @@ class Connection:
         try:
             return await self._read()
         except asyncio.IncompleteReadError as error:
-            if error.partial:
-                self.log.error("reading error: %r", error)
-            else:
+            if not error.partial:
+                # The client may only have shut down its sending side: leave
+                # the stream open for the replies still owed, the owner of
+                # the connection closes it once they are written
                 self.log.info("client closed connection")
+                return
+            self.log.error("reading error: %r", error)
             await self.close()
         except Exception as error:
             self.log.error("reading error: %r", error)
             await self.close()
 
-    def _log_modbus_message(self, data, direction):
-        """Enhanced logging for modbus messages with parsed details"""
+    def _log_modbus_message(self, data, direction, mbap=None):
+        """Enhanced logging for modbus messages with parsed details
+
+        mbap is the already decoded (transaction_id, protocol_id, length,
+        unit_id) header, if the caller has it.
+        """
         if len(data) < 7:
             return
             
         try:
-            import struct
             # Parse MBAP header
-            transaction_id, protocol_id, length, unit_id = struct.unpack('>HHHB', data[:7])
+            if mbap is None:
+                mbap = _MBAP_FULL.unpack_from(data, 0)
+            transaction_id, protocol_id, length, unit_id = mbap
             
             if len(data) > 7:
                 function_code = data[7]
                 pdu = data[8:]
                 
                 # Log basic info
-                self.log.debug(f"{direction}: TxID={transaction_id}, Unit={unit_id}, FC={function_code:02X}")
+                self.log.debug("%s: TxID=%s, Unit=%s, FC=%02X", direction, transaction_id, unit_id, function_code)
                 
                 # Parse function-specific data for read responses
                 if direction == "received" and function_code in [0x01, 0x02, 0x03, 0x04] and len(pdu) > 0:
@@ -263,23 +521,15 @@ class Connection:
                         values_data = pdu[1:1+byte_count]
                         
                         if function_code in [0x01, 0x02]:  # Coils/Discrete Inputs
-                            values = []
-                            for i, byte_val in enumerate(values_data):
-                                for bit in range(8):
-                                    if i * 8 + bit < byte_count * 8:
-                                        values.append((byte_val >> bit) & 1)
-                            self.log.debug(f"Values: {values[:16]}{'...' if len(values) > 16 else ''}")
+                            values = _unpack_bits(values_data, 16)
+                            self.log.debug("Values: %s%s", values, '...' if byte_count * 8 > 16 else '')
                             
                         elif function_code in [0x03, 0x04]:  # Holding/Input Registers
-                            values = []
-                            for i in range(0, len(values_data), 2):
-                                if i + 1 < len(values_data):
-                                    value = struct.unpack('>H', values_data[i:i+2])[0]
-                                    values.append(value)
-                            self.log.debug(f"Registers: {values[:8]}{'...' if len(values) > 8 else ''}")
+                            values = _unpack_registers(values_data)
+                            self.log.debug("Registers: %s%s", values[:8], '...' if len(values) > 8 else '')
                             
         except Exception as e:
-            self.log.debug(f"Failed to parse modbus message: {e}")
+            self.log.debug("Failed to parse modbus message: %s", e)
 
     def _log_rtu_message(self, data, direction):
         """Enhanced logging for RTU modbus messages with parsed details"""
@@ -287,7 +537,6 @@ class Connection:
             return
             
         try:
-            import struct
             # Parse RTU frame: [slave_id][function_code][data][crc_low][crc_high]
             slave_id = data[0]
             function_code = data[1]
@@ -295,7 +544,7 @@ class Connection:
             crc = data[-2:]
             
             # Log basic info
-            self.log.debug(f"{direction} RTU: Slave={slave_id}, FC={function_code:02X}")
+            self.log.debug("%s RTU: Slave=%s, FC=%02X", direction, slave_id, function_code)
             
             # Parse function-specific data for read responses
             if direction == "received" and function_code in [0x01, 0x02, 0x03, 0x04] and len(rtu_data) > 1:
@@ -304,106 +553,89 @@ class Connection:
                     values_data = rtu_data[1:1+byte_count]
                     
                     if function_code in [0x01, 0x02]:  # Coils/Discrete Inputs
-                        values = []
-                        for i, byte_val in enumerate(values_data):
-                            for bit in range(8):
-                                if i * 8 + bit < byte_count * 8:
-                                    values.append((byte_val >> bit) & 1)
-                        self.log.debug(f"RTU Values: {values[:16]}{'...' if len(values) > 16 else ''}")
+                        values = _unpack_bits(values_data, 16)
+                        self.log.debug("RTU Values: %s%s", values, '...' if byte_count * 8 > 16 else '')
                         
                     elif function_code in [0x03, 0x04]:  # Holding/Input Registers
-                        values = []
-                        for i in range(0, len(values_data), 2):
-                            if i + 1 < len(values_data):
-                                value = struct.unpack('>H', values_data[i:i+2])[0]
-                                values.append(value)
-                        self.log.debug(f"RTU Values: {values[:8]}{'...' if len(values) > 8 else ''}")
+                        values = _unpack_registers(values_data)
+                        self.log.debug("RTU Values: %s%s", values[:8], '...' if len(values) > 8 else '')
 
             # Parse function-specific data for read responses
             if direction == "received_from_client" and function_code in [0x01, 0x02, 0x03, 0x04] and len(rtu_data) >= 4:
-                values = []
-                for i in range(0, len(rtu_data)-1, 2):
-                    value = struct.unpack('>H', rtu_data[i:i+2])[0]
-                    values.append(value)
-                self.log.debug(f"RTU Registers: {values[:8]}{'...' if len(values) > 8 else ''}")
+                values = _unpack_registers(rtu_data)
+                self.log.debug("RTU Registers: %s%s", values[:8], '...' if len(values) > 8 else '')
                         
         except Exception as e:
-            self.log.debug(f"Failed to parse RTU message: {e}")
+            self.log.debug("Failed to parse RTU message: %s", e)
 
 
 class Client(Connection):
     def __init__(self, reader, writer):
         peer = writer.get_extra_info("peername")
-        super().__init__(f"Client({peer[0]}:{peer[1]})", reader, writer)
+        name = f"{peer[0]}:{peer[1]}"
+        super().__init__(f"Client({name})", reader, writer, PeerLogAdapter(CLIENT_LOG, name))
         self.client_ip = peer[0]
         self.client_port = peer[1]
         self.request_count = 0
-        self.log.info(f"new client connection from {self.client_ip}:{self.client_port} -> to Proxy")
+        # The client stream lives as long as this connection: bind it once
+        self._readexactly = reader.readexactly
+        self.log.info("new client connection -> to Proxy")
         
-    async def _write(self, data):
+    def queue(self, data):
+        """Queue a response for the next flush()"""
         # Enhanced logging for client writes (responses)
-        self.log.debug(f"[{self.client_ip}:{self.client_port}] → Response: %d bytes", len(data))
-        if self.log.isEnabledFor(logging.DEBUG) and len(data) >= 7:
-            self._log_modbus_message(data, "sent_to_client")
-        self.writer.write(data)
-        await self.writer.drain()
+        if self._debug:
+            self.log.debug("→ Response: %d bytes", len(data))
+            if len(data) >= 7:
+                self._log_modbus_message(data, "sent_to_client")
+        self._out_q.append(data)
+
+    async def _write(self, data):
+        self.queue(data)
+        await self._flush_tcp()
         
     async def _read(self):
         """Read ModBus message from client with auto-detection"""
         # Auto-detect TCP vs RTU over TCP format from Home Assistant
         
-        # Read first 6 bytes to check format
-        first_bytes = await self.reader.readexactly(6)
+        # Read the first 8 bytes: every request either format can carry is
+        # at least that long, and a plain read request is complete with them
+        first_bytes = await self._readexactly(8)
         
         # Check if it's TCP format by looking at Protocol ID (bytes 2-3)
-        protocol_id = int.from_bytes(first_bytes[2:4], "big")
+        transaction_id, protocol_id, size = _MBAP_HEAD.unpack_from(first_bytes)
         
         if protocol_id == 0:
             # TCP format detected: [MBAP Header 6 bytes][Unit ID][Function][Data]
-            size = int.from_bytes(first_bytes[4:6], "big")
-            reply = first_bytes + await self.reader.readexactly(size)
+            # Return a bytearray so the unit ID can be remapped in place
+            if size < 2:
+                raise ValueError(f"invalid MBAP length {size}")
+            reply = bytearray(first_bytes)
+            if size > 2:
+                reply += await self._readexactly(size - 2)
             
             self.request_count += 1
-            self.log.debug(f"[{self.client_ip}:{self.client_port}] ← TCP Request #{self.request_count}: %d bytes", len(reply))
-            
-            if self.log.isEnabledFor(logging.DEBUG) and len(reply) >= 7:
-                self._log_modbus_message(reply, "received_from_client")
+            if self._debug:
+                self.log.debug("← TCP Request #%d: %d bytes", self.request_count, len(reply))
+                mbap = (transaction_id, protocol_id, size, reply[6])
+                self._log_modbus_message(reply, "received_from_client", mbap)
             
             return reply
             
         else:
             # RTU over TCP format detected: [Unit ID][Function][Data][CRC]
-            # first_bytes contains: [Unit ID][Function][4 bytes of data/address]
-            unit_id = first_bytes[0]
-            function_code = first_bytes[1]
-            
-            # Read remaining data based on function code
-            remaining_data = first_bytes[2:]  # Already have 4 bytes
-            
-            if function_code in [0x01, 0x02, 0x03, 0x04]:  # Read functions
-                # Format: [Unit][Func][Address 2][Count 2][CRC 2] = 8 bytes total
-                # We have 6 bytes, need 2 more (CRC)
-                remaining_data += await self.reader.readexactly(2)
-            elif function_code in [0x05, 0x06]:  # Write single
-                # Format: [Unit][Func][Address 2][Value 2][CRC 2] = 8 bytes total
-                # We have 6 bytes, need 2 more (CRC)
-                remaining_data += await self.reader.readexactly(2)
-            elif function_code in [0x0F, 0x10]:  # Write multiple
-                # We need to read byte count first, then data, then CRC
-                byte_count = remaining_data[2]  # 5th byte overall
-                if len(remaining_data) < 3 + byte_count + 2:  # Need more data
-                    additional_needed = 3 + byte_count + 2 - len(remaining_data)
-                    remaining_data += await self.reader.readexactly(additional_needed)
-            else:
-                # Unknown function, try to read 2 more bytes (CRC)
-                remaining_data += await self.reader.readexactly(2)
+            # Read functions (0x01-0x04) and single writes (0x05, 0x06) are
+            # [Unit][Func][Address 2][Count/Value 2][CRC 2] = 8 bytes, and
+            # an unknown function is taken to be that long as well
+            reply = bytearray(first_bytes)
             
-            reply = bytes([unit_id, function_code]) + remaining_data
+            if first_bytes[1] in (0x0F, 0x10):  # Write multiple
+                # [Unit][Func][Address 2][Quantity 2][Byte count][Data][CRC 2]
+                reply += await self._readexactly(first_bytes[6] + 1)
             
             self.request_count += 1
-            self.log.debug(f"[{self.client_ip}:{self.client_port}] ← RTU over TCP Request #{self.request_count}: %d bytes", len(reply))
-            
-            if self.log.isEnabledFor(logging.DEBUG) and len(reply) >= 4:
+            if self._debug:
+                self.log.debug("← RTU over TCP Request #%d: %d bytes", self.request_count, len(reply))
                 self._log_rtu_message(reply, "received_from_client")
             
             return reply
@@ -456,9 +688,62 @@ class ModBus(Connection):
         self.port = 502 if bind.port is None else bind.port
         self.timeout = modbus.get("timeout", None)
         self.connection_time = modbus.get("connection_time", 0)
-        self.unit_id_remapping = config.get("unit_id_remapping") or {}
+        # Modbus TCP requests sent before the oldest one is answered. Many
+        # servers only parse one request at a time: 1 waits for each reply
+        self.max_inflight = int(modbus.get("max_inflight", 1))
+        if self.max_inflight < 1:
+            raise ValueError(f"max_inflight must be at least 1, not {self.max_inflight}")
+        # Socket tuning for both client and device TCP connections
+        self.tcp_nodelay = config.get("tcp_nodelay", True)
+        self.write_buffer_high = config.get("write_buffer_high", 0)
+        # Forward (request) and inverse (reply) unit ID lookup tables, built
+        # once; a unit ID is one byte, so each map is 256 bytes indexed by it.
+        # JSON (and some YAML) configs give the unit IDs as strings
+        self.unit_id_remapping = {}
+        forward, inverse = bytearray(_IDENTITY_MAP), bytearray(_IDENTITY_MAP)
+        for key, value in (config.get("unit_id_remapping") or {}).items():
+            try:
+                uid, new_uid = int(key), int(value)
+            except (TypeError, ValueError):
+                uid = new_uid = -1  # not a number: rejected below
+            if not (0 <= uid <= 255 and 0 <= new_uid <= 255):
+                raise ValueError(
+                    f"unit_id_remapping {key!r}: {value!r} is not a unit ID (0-255)"
+                )
+            self.unit_id_remapping[uid] = forward[uid] = new_uid
+            inverse[new_uid] = uid
+        self._fwd = bytes(forward)
+        self._inv = bytes(inverse)
+        self._remapping = self._fwd != _IDENTITY_MAP
+        # Framing spoken by the device, as named by the transforms
+        self._device_format = "TCP" if self.modbus_type == "tcp" else "RTU over TCP"
+        # Per-frame debug formats, with the device part filled in once
+        if self.modbus_type == "rtu":
+            target = request_tag = reply_tag = f"RTU:{self.device}"
+        else:
+            endpoint = f"{self.modbus_host}:{self.modbus_port}"
+            request_tag = f"TCP:{endpoint}"
+            if self.modbus_type == "tcp":
+                target = reply_tag = request_tag
+            else:
+                target, reply_tag = f"RTU(over)TCP:{endpoint}", f"RTUoverTCP:{endpoint}"
+        self._request_fmt = "[%s] → Request: %%d bytes" % request_tag.replace("%", "%%")
+        self._reply_fmt = "[%s] ← Response: %%d bytes" % reply_tag.replace("%", "%%")
+        self._proxy_fmt = "PROXY: %%s:%%s → %s (Request #%%d, %%s)" % target.replace("%", "%%")
         self.server = None
-        self.lock = asyncio.Lock()
+        # Device addresses resolved from modbus_host, see _resolve()
+        self._resolved = None
+        # Whether the serial device passed _validate_device()
+        self._validated = False
+        # Requests for the device, consumed by the single _worker_task
+        self._submit_q = asyncio.Queue()
+        self._worker_task = None
+        # Modbus TCP transactions in flight, keyed by the proxy transaction ID
+        self._pending = {}
+        # Set whenever one of them completes, see _process_requests()
+        self._slot_free = asyncio.Event()
+        self._transaction_id = 0
+        self._reader_task = None
 
     @property
     def address(self):
@@ -468,31 +753,11 @@ class ModBus(Connection):
     async def open(self):
         if self.modbus_type == "rtu":
             self.log.info(f"connecting to RTU device {self.device}...")
-            
-            # Check device permissions and existence
-            if not os.path.exists(self.device):
-                raise FileNotFoundError(f"Serial device {self.device} not found")
-            
-            # Check device existence and type
-            if not os.path.exists(self.device):
-                raise FileNotFoundError(f"Serial device {self.device} not found")
-            
-            try:
-                device_stat = os.stat(self.device)
-                if not stat.S_ISCHR(device_stat.st_mode):
-                    raise ValueError(f"{self.device} is not a character device")
-                
-                # Check if we have read/write permissions (set by Supervisor)
-                if not os.access(self.device, os.R_OK | os.W_OK):
-                    self.log.error(f"Insufficient permissions for {self.device}. Check Supervisor device mapping.")
-                    raise PermissionError(f"Cannot access {self.device} - check config.yaml devices list")
-            except Exception as e:
-                self.log.error(f"Device check failed: {e}")
-                raise
+            if not self._validated:
+                self._validate_device()
             
             # Use asyncio serial connection
-            try:
-                import serial_asyncio
+            if _HAS_SERIAL_ASYNCIO:
                 self.serial_reader, self.serial_writer = await serial_asyncio.open_serial_connection(
                     url=self.device,
                     baudrate=self.baudrate,
@@ -502,10 +767,9 @@ class ModBus(Connection):
                     timeout=self.timeout
                 )
                 self.log.info(f"connected to RTU device {self.device}!")
-            except ImportError:
+            elif _HAS_SERIAL:
                 # Fallback to synchronous serial if asyncio version not available
                 self.log.warning("pyserial-asyncio not available, using synchronous fallback")
-                import serial
                 self.serial = serial.Serial(
                     port=self.device,
                     baudrate=self.baudrate,
@@ -515,56 +779,262 @@ class ModBus(Connection):
                     timeout=self.timeout
                 )
                 self.log.info(f"connected to RTU device {self.device} (sync mode)!")
+            else:
+                raise ImportError("pyserial is required for RTU devices")
         else:
             self.log.info(f"connecting Proxy to Modbus Device({self.modbus_host}:{self.modbus_port})...")
+            if not self._resolved:
+                await self._resolve()
+            error = None
+            for address in self._resolved:
+                try:
+                    await self._open_tcp(address)
+                    break
+                except OSError as exc:
+                    error = exc
+            else:
+                # The device may have moved: resolve again on the next attempt
+                self._resolved = None
+                raise error
+            self._tune_transport(self.writer.transport)
+            self.log.info(f"connected to Device({self.modbus_host}:{self.modbus_port})!")
+
+    def _tune_transport(self, transport):
+        """Apply tcp_nodelay and write_buffer_high to a TCP transport"""
+        sock = transport.get_extra_info("socket")
+        if sock is not None and sock.family in (socket.AF_INET, socket.AF_INET6):
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, int(bool(self.tcp_nodelay)))
+            if self.tcp_nodelay and hasattr(socket, "TCP_QUICKACK"):
+                # Linux only, and not sticky: the kernel falls back to delayed
+                # ACKs on its own, so this only speeds up the first exchanges
+                sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_QUICKACK, 1)
+        if self.write_buffer_high is not None:
+            # high=0: drain() waits until the kernel has taken every frame
+            # written so far, so a flush does not return with data still queued
+            transport.set_write_buffer_limits(high=self.write_buffer_high)
+
+    async def _open_tcp(self, address):
+        if self.modbus_type == "tcp":
+            loop = asyncio.get_running_loop()
+            _, protocol = await loop.create_connection(
+                ModbusProtocol, address, self.modbus_port
+            )
+            self.reader = self.writer = protocol
+        else:
             self.reader, self.writer = await asyncio.open_connection(
-                self.modbus_host, self.modbus_port
+                address, self.modbus_port
             )
-            self.log.info(f"connected to Device({self.modbus_host}:{self.modbus_port})!")
+
+    def _validate_device(self):
+        """Check the serial device once instead of on every reconnect"""
+        try:
+            # Check device existence and type
+            if not os.path.exists(self.device):
+                raise FileNotFoundError(f"Serial device {self.device} not found")
+            device_stat = os.stat(self.device)
+            if not stat.S_ISCHR(device_stat.st_mode):
+                raise ValueError(f"{self.device} is not a character device")
+            
+            # Check if we have read/write permissions (set by Supervisor)
+            if not os.access(self.device, os.R_OK | os.W_OK):
+                self.log.error(f"Insufficient permissions for {self.device}. Check Supervisor device mapping.")
+                raise PermissionError(f"Cannot access {self.device} - check config.yaml devices list")
+        except Exception as e:
+            self.log.error(f"Device check failed: {e}")
+            raise
+        self._validated = True
+
+    async def _resolve(self):
+        """Look up the device addresses once instead of on every reconnect"""
+        loop = asyncio.get_running_loop()
+        infos = await loop.getaddrinfo(
+            self.modbus_host, self.modbus_port, type=socket.SOCK_STREAM
+        )
+        self._resolved = list(dict.fromkeys(
+            self._sockaddr_host(family, sockaddr)
+            for family, _, _, _, sockaddr in infos
+        ))
+
+    @staticmethod
+    def _sockaddr_host(family, sockaddr):
+        """Turn a resolved sockaddr back into a host, keeping any IPv6 scope ID"""
+        if family == socket.AF_INET6 and sockaddr[3]:
+            return f"{sockaddr[0]}%{sockaddr[3]}"
+        return sockaddr[0]
 
     async def connect(self):
         if not self.opened:
-            await asyncio.wait_for(self.open(), self.timeout)
+            async with asyncio.timeout(self.timeout):
+                await self.open()
+            if self.modbus_type == "tcp":
+                self._reader_task = asyncio.create_task(self._read_replies())
             if self.connection_time > 0:
                 self.log.info("delay after connect: %s", self.connection_time)
                 await asyncio.sleep(self.connection_time)
 
-    async def write_read(self, data, attempts=2):
-        async with self.lock:
-            for i in range(attempts):
-                try:
-                    await self.connect()
-                    coro = self._write_read(data)
-                    return await asyncio.wait_for(coro, self.timeout)
-                except Exception as error:
-                    self.log.error(
-                        "write_read error [%s/%s]: %r", i + 1, attempts, error
-                    )
+    async def close(self):
+        task, self._reader_task = self._reader_task, None
+        if task is not None and task is not asyncio.current_task():
+            task.cancel()
+        for future in self._pending.values():
+            if not future.done():
+                future.set_exception(ConnectionError("connection closed"))
+        self._pending.clear()
+        await super().close()
+
+    def _submit(self, data):
+        """Queue a request for the device and return the future of its reply"""
+        if self._worker_task is None or self._worker_task.done():
+            self._worker_task = asyncio.create_task(self._process_requests())
+        future = asyncio.get_running_loop().create_future()
+        self._submit_q.put_nowait((data, future))
+        return future
+
+    async def _process_requests(self):
+        """Sole writer to the device: connect and send queued requests in order
+
+        Modbus TCP replies are routed back by _read_replies, so up to
+        max_inflight requests are sent without waiting for the replies of
+        those before. Only then are requests queued together written in a
+        single call: with max_inflight at 1 each one goes out on its own,
+        as servers that parse one request per recv() need. RTU frames
+        carry no transaction ID: each one is answered before the next is
+        sent.
+        """
+        while True:
+            if self._out_q and (
+                self._submit_q.empty() or len(self._pending) >= self.max_inflight
+            ):
+                # Nothing left to batch with, or no room for more
+                await self._flush_requests()
+            while len(self._pending) >= self.max_inflight:
+                # Hold the next request back until a transaction completes
+                self._slot_free.clear()
+                await self._slot_free.wait()
+            data, target = await self._submit_q.get()
+            if data is None:
+                # The device stopped answering: drop the connection it was on
+                if target is self.writer:
                     await self.close()
+                continue
+            future = target
+            if future.done():
+                continue  # the requester gave up while queued
+            try:
+                await self.connect()
+                if self.modbus_type == "tcp":
+                    self._send(data, future)
+                else:
+                    async with asyncio.timeout(self.timeout):
+                        reply = await self._write_read(data)
+                    if not future.done():
+                        future.set_result(reply)
+            except Exception as error:
+                if not future.done():
+                    future.set_exception(error)
+                if isinstance(error, TimeoutError):
+                    self._abort(self.writer)
+                await self.close()
+
+    async def _flush_requests(self):
+        """Write out the queued TCP requests, dropping a device that stopped reading"""
+        try:
+            async with asyncio.timeout(self.timeout):
+                await self._flush_tcp()
+        except Exception as error:
+            # close() fails the transactions that were not sent
+            self.log.error("writting error: %r", error)
+            if isinstance(error, TimeoutError):
+                self._abort(self.writer)
+            await self.close()
 
     async def _write_read(self, data):
         await self._write(data)
         return await self._read()
 
+    def _send(self, data, future):
+        """Queue a Modbus TCP request; _read_replies resolves its future
+
+        The client transaction ID is swapped for a proxy-unique one so that
+        requests from several clients can be in flight on the same device
+        connection.
+        """
+        tid = self._transaction_id
+        while tid in self._pending:
+            tid = (tid + 1) & 0xFFFF
+        self._transaction_id = (tid + 1) & 0xFFFF
+        request = data if isinstance(data, bytearray) else bytearray(data)
+        _MBAP_LEN.pack_into(request, 0, tid)
+        self._pending[tid] = future
+        timer = None
+        if self.timeout is not None:
+            loop = asyncio.get_running_loop()
+            timer = loop.call_later(self.timeout, self._expire, tid, self.writer)
+
+        def done(_):
+            if timer is not None:
+                timer.cancel()
+            if self._pending.get(tid) is future:
+                del self._pending[tid]
+            self._slot_free.set()
+
+        future.add_done_callback(done)
+        if self._debug:
+            self.log.debug(self._request_fmt, len(request))
+        self._out_q.append(request)
+
+    def _expire(self, tid, writer):
+        future = self._pending.pop(tid, None)
+        if future is not None and not future.done():
+            future.set_exception(asyncio.TimeoutError())
+        # The worker may itself be stuck writing to this connection
+        self._abort(writer)
+        self._submit_q.put_nowait((None, writer))
+
+    def _abort(self, writer):
+        """Drop a device connection at once, unsent data included
+
+        close() would wait for the write buffer to drain, which never
+        happens on a device that stopped reading.
+        """
+        if writer is not None and writer is self.writer:
+            writer.transport.abort()
+
+    async def _read_replies(self):
+        """Route device replies to the pending transactions by transaction ID"""
+        try:
+            while True:
+                reply = await self._read()
+                tid = _MBAP_LEN.unpack_from(reply, 0)[0]
+                future = self._pending.pop(tid, None)
+                if future is None:
+                    self.log.warning("dropping reply for unknown transaction ID %d", tid)
+                elif not future.done():
+                    future.set_result(reply)
+        except asyncio.IncompleteReadError as error:
+            self.log.info("device closed connection: %r", error)
+        except Exception as error:
+            self.log.error("reading error: %r", error)
+        for future in self._pending.values():
+            if not future.done():
+                future.set_exception(ConnectionError("connection lost"))
+        self._pending.clear()
+        # Leave the close to the worker so it cannot race a reconnect
+        self._submit_q.put_nowait((None, self.writer))
+
 		
-    def _crc(self,data):
-        crc = 0xffff
-        for n in range(len(data)):
-            crc ^= data[n]
-            for i in range(8):
-                if crc & 1:
-                    crc >>= 1
-                    crc ^= 0xA001
-                else:
-                    crc >>= 1
-        return crc				
-		
+    def _crc(self, data):
+        crc = 0xFFFF
+        for byte in data:
+            crc = (crc >> 8) ^ _CRC16_TABLE[(crc ^ byte) & 0xFF]
+        return crc
+
     def _transform_request(self, request, source_format=None):
         """Transform request from HA to appropriate format for target device"""
         
         # Auto-detect input format if not provided
         if source_format is None:
-            is_tcp_input = len(request) >= 6 and int.from_bytes(request[2:4], "big") == 0
+            is_tcp_input = len(request) >= 6 and _MBAP_LEN.unpack_from(request, 2)[0] == 0
             input_format = "TCP" if is_tcp_input else "RTU over TCP"
         else:
             input_format = source_format
@@ -586,7 +1056,8 @@ class ModBus(Connection):
                 # TCP: [MBAP Header 6 bytes][Unit ID][Function][Data]
                 # RTU: [Unit ID][Function][Data][CRC 2 bytes]
                 
-                self.log.debug(f"TRANSFORM: {input_format} → {target_format} (TCP → RTU conversion)")
+                if self._debug:
+                    self.log.debug("TRANSFORM: %s → %s (TCP → RTU conversion)", input_format, target_format)
                 
                 if len(request) < 7:
                     self.log.error("Invalid TCP request length: %d bytes", len(request))
@@ -597,29 +1068,27 @@ class ModBus(Connection):
                 rtu_data = request[6:]  # Unit ID + Function + Data
                 
                 # Apply unit ID remapping
-                new_uid = self.unit_id_remapping.setdefault(uid, uid)
+                new_uid = self._fwd[uid]
                 if uid != new_uid:
-                    rtu_data = bytearray(rtu_data)
                     rtu_data[0] = new_uid
                     self.log.debug("remapping unit ID %s to %s in request", uid, new_uid)
                 
                 # Calculate and append CRC
-                crc = self._crc(rtu_data)
-                rtu_request = bytes(rtu_data) + crc.to_bytes(2, byteorder='little')
+                rtu_data += self._crc(rtu_data).to_bytes(2, byteorder='little')
                 
-                return rtu_request
+                return rtu_data
                 
             else:
                 # Input is already RTU over TCP, just handle unit ID remapping
-                self.log.debug(f"TRANSFORM: {input_format} → {target_format} (RTU passthrough)")
+                if self._debug:
+                    self.log.debug("TRANSFORM: %s → %s (RTU passthrough)", input_format, target_format)
                 
                 uid = request[0]
-                new_uid = self.unit_id_remapping.setdefault(uid, uid)
+                new_uid = self._fwd[uid]
                 if uid != new_uid:
-                    request = bytearray(request)
                     request[0] = new_uid
                     # Recalculate CRC
-                    request = request[0:-2] + self._crc(request[0:-2]).to_bytes(2, byteorder='little')
+                    request[-2:] = self._crc(memoryview(request)[:-2]).to_bytes(2, byteorder='little')
                     self.log.debug("remapping unit ID %s to %s in request", uid, new_uid)
                 return request
             
@@ -628,12 +1097,12 @@ class ModBus(Connection):
             
             if is_tcp_input:
                 # Input is TCP, keep TCP format, only handle unit ID remapping
-                self.log.debug(f"TRANSFORM: {input_format} → {target_format} (TCP passthrough)")
+                if self._debug:
+                    self.log.debug("TRANSFORM: %s → %s (TCP passthrough)", input_format, target_format)
                 
                 uid = request[6]
-                new_uid = self.unit_id_remapping.setdefault(uid, uid)
+                new_uid = self._fwd[uid]
                 if uid != new_uid:
-                    request = bytearray(request)
                     request[6] = new_uid
                     self.log.debug("remapping unit ID %s to %s in request", uid, new_uid)
                 return request
@@ -643,30 +1112,25 @@ class ModBus(Connection):
                 # RTU: [Unit ID][Function][Data][CRC 2 bytes]
                 # TCP: [MBAP Header 6 bytes][Unit ID][Function][Data]
                 
-                self.log.debug(f"TRANSFORM: {input_format} → {target_format} (RTU → TCP conversion)")
+                if self._debug:
+                    self.log.debug("TRANSFORM: %s → %s (RTU → TCP conversion)", input_format, target_format)
                 
                 if len(request) < 4:
                     self.log.error("Invalid RTU request length: %d bytes", len(request))
                     return request
                     
-                # Extract RTU data (without CRC)
-                rtu_data = request[:-2]  # Remove CRC
-                uid = rtu_data[0]
+                # Create TCP request with MBAP header (transaction ID 1,
+                # protocol ID 0) followed by the RTU data without its CRC
+                tcp_request = bytearray(_MBAP_HEAD.pack(1, 0, len(request) - 2))
+                tcp_request += memoryview(request)[:-2]
+                uid = tcp_request[6]
                 
                 # Apply unit ID remapping
-                new_uid = self.unit_id_remapping.setdefault(uid, uid)
+                new_uid = self._fwd[uid]
                 if uid != new_uid:
-                    rtu_data = bytearray(rtu_data)
-                    rtu_data[0] = new_uid
+                    tcp_request[6] = new_uid
                     self.log.debug("remapping unit ID %s to %s in request", uid, new_uid)
                 
-                # Create TCP request with MBAP header
-                transaction_id = b'\x00\x01'  # Simple transaction ID
-                protocol_id = b'\x00\x00'    # Modbus protocol
-                length = len(rtu_data).to_bytes(2, byteorder='big')
-                
-                tcp_request = transaction_id + protocol_id + length + rtu_data
-                
                 return tcp_request
 
     def _transform_reply(self, reply, target_format="TCP"):
@@ -688,37 +1152,31 @@ class ModBus(Connection):
                 # RTU: [Unit ID][Function][Data][CRC 2 bytes]
                 # TCP: [MBAP Header 6 bytes][Unit ID][Function][Data]
                 
-                self.log.debug(f"TRANSFORM REPLY: {source_format} → {target_format} (RTU → TCP conversion)")
+                if self._debug:
+                    self.log.debug("TRANSFORM REPLY: %s → %s (RTU → TCP conversion)", source_format, target_format)
                 
                 if len(reply) < 4:
                     self.log.error("Invalid RTU reply length: %d bytes", len(reply))
                     return reply
                     
-                # Extract RTU data (without CRC)
-                rtu_data = reply[:-2]  # Remove CRC
-                uid = rtu_data[0]
+                # Create TCP reply with MBAP header
+                # MBAP: [Transaction ID 2][Protocol ID 2][Length 2][Unit ID + Function + Data]
+                tcp_reply = bytearray(_MBAP_HEAD.pack(1, 0, len(reply) - 2))
+                tcp_reply += memoryview(reply)[:-2]
+                uid = tcp_reply[6]
                 
                 # Apply inverse unit ID remapping
-                inverse_unit_id_map = {v: k for k, v in self.unit_id_remapping.items()}
-                new_uid = inverse_unit_id_map.setdefault(uid, uid)
+                new_uid = self._inv[uid]
                 if uid != new_uid:
-                    rtu_data = bytearray(rtu_data)
-                    rtu_data[0] = new_uid
+                    tcp_reply[6] = new_uid
                     self.log.debug("remapping unit ID %s to %s in reply", uid, new_uid)
                 
-                # Create TCP reply with MBAP header
-                # MBAP: [Transaction ID 2][Protocol ID 2][Length 2][Unit ID + Function + Data]
-                transaction_id = b'\x00\x01'  # Simple transaction ID
-                protocol_id = b'\x00\x00'    # Modbus protocol
-                length = len(rtu_data).to_bytes(2, byteorder='big')
-                
-                tcp_reply = transaction_id + protocol_id + length + rtu_data
-                
                 return tcp_reply
                 
             else:
                 # Keep RTU format for HA (RTU over TCP)
-                self.log.debug(f"TRANSFORM REPLY: {source_format} → {target_format} (RTU passthrough)")
+                if self._debug:
+                    self.log.debug("TRANSFORM REPLY: %s → %s (RTU passthrough)", source_format, target_format)
                 
                 if len(reply) < 4:
                     self.log.error("Invalid RTU reply length: %d bytes", len(reply))
@@ -726,13 +1184,11 @@ class ModBus(Connection):
                     
                 # Apply inverse unit ID remapping
                 uid = reply[0]
-                inverse_unit_id_map = {v: k for k, v in self.unit_id_remapping.items()}
-                new_uid = inverse_unit_id_map.setdefault(uid, uid)
+                new_uid = self._inv[uid]
                 if uid != new_uid:
-                    reply = bytearray(reply)
                     reply[0] = new_uid
                     # Recalculate CRC
-                    reply = reply[0:-2] + self._crc(reply[0:-2]).to_bytes(2, byteorder='little')
+                    reply[-2:] = self._crc(memoryview(reply)[:-2]).to_bytes(2, byteorder='little')
                     self.log.debug("remapping unit ID %s to %s in reply", uid, new_uid)
                 
                 return reply
@@ -742,13 +1198,12 @@ class ModBus(Connection):
             
             if target_format == "TCP":
                 # Keep TCP format for HA
-                self.log.debug(f"TRANSFORM REPLY: {source_format} → {target_format} (TCP passthrough)")
+                if self._debug:
+                    self.log.debug("TRANSFORM REPLY: %s → %s (TCP passthrough)", source_format, target_format)
                 
                 uid = reply[6]
-                inverse_unit_id_map = {v: k for k, v in self.unit_id_remapping.items()}
-                new_uid = inverse_unit_id_map.setdefault(uid, uid)
+                new_uid = self._inv[uid]
                 if uid != new_uid:
-                    reply = bytearray(reply)
                     reply[6] = new_uid
                     self.log.debug("remapping unit ID %s to %s in reply", uid, new_uid)
                 return reply
@@ -758,7 +1213,8 @@ class ModBus(Connection):
                 # TCP: [MBAP Header 6 bytes][Unit ID][Function][Data]
                 # RTU: [Unit ID][Function][Data][CRC 2 bytes]
                 
-                self.log.debug(f"TRANSFORM REPLY: {source_format} → {target_format} (TCP → RTU conversion)")
+                if self._debug:
+                    self.log.debug("TRANSFORM REPLY: %s → %s (TCP → RTU conversion)", source_format, target_format)
                 
                 if len(reply) < 7:
                     self.log.error("Invalid TCP reply length: %d bytes", len(reply))
@@ -769,48 +1225,122 @@ class ModBus(Connection):
                 rtu_data = reply[6:]  # Unit ID + Function + Data
                 
                 # Apply inverse unit ID remapping
-                inverse_unit_id_map = {v: k for k, v in self.unit_id_remapping.items()}
-                new_uid = inverse_unit_id_map.setdefault(uid, uid)
+                new_uid = self._inv[uid]
                 if uid != new_uid:
-                    rtu_data = bytearray(rtu_data)
                     rtu_data[0] = new_uid
                     self.log.debug("remapping unit ID %s to %s in reply", uid, new_uid)
                 
                 # Calculate and append CRC
-                crc = self._crc(rtu_data)
-                rtu_reply = bytes(rtu_data) + crc.to_bytes(2, byteorder='little')
+                rtu_data += self._crc(rtu_data).to_bytes(2, byteorder='little')
                 
-                return rtu_reply
+                return rtu_data
 
     async def handle_client(self, reader, writer):
-	
-	
         async with Client(reader, writer) as client:
-            while True:
-                request = await client.read()
-                if not request:
-                    break
-                
-                # Detect client request format (TCP vs RTU over TCP)
-                is_tcp_request = len(request) >= 6 and int.from_bytes(request[2:4], "big") == 0
-                client_format = "TCP" if is_tcp_request else "RTU over TCP"
-                
-                # Log proxy activity overview
-                if hasattr(self, 'modbus_type') and self.modbus_type == 'rtu':
-                    self.log.debug(f"PROXY: {client.client_ip}:{client.client_port} → RTU:{self.device} (Request #{client.request_count}, {client_format})")
-                elif hasattr(self, 'modbus_type') and self.modbus_type == 'rtutcp':
-                    self.log.debug(f"PROXY: {client.client_ip}:{client.client_port} → RTU(over)TCP:{self.modbus_host}:{self.modbus_port} (Request #{client.request_count}, {client_format})")
-                else:
-                    self.log.debug(f"PROXY: {client.client_ip}:{client.client_port} → TCP:{self.modbus_host}:{self.modbus_port} (Request #{client.request_count}, {client_format})")
-                
-                reply = await self.write_read(self._transform_request(request, client_format))
-                if not reply:
-                    break
-                result = await client.write(self._transform_reply(reply, client_format))
-                if not result:
+            # Inside the block so the stream is closed should the peer
+            # already be gone and setsockopt() fail
+            self._tune_transport(writer.transport)
+            # Requests are submitted as soon as they are read so transactions
+            # from one client overlap; replies go back in request order
+            replies = asyncio.Queue(_CLIENT_PIPELINE)
+            reader_pump = asyncio.create_task(self._client_reader_pump(client, replies))
+            writer_pump = asyncio.create_task(self._client_writer_pump(client, replies))
+            try:
+                await asyncio.wait(
+                    (reader_pump, writer_pump), return_when=asyncio.FIRST_COMPLETED
+                )
+                if not writer_pump.done() and reader_pump.exception() is None:
+                    # No more requests: answer those still queued. A failed
+                    # reader pump would never queue the None the writer
+                    # pump stops on, so that case ends the connection here
+                    await writer_pump
+            finally:
+                reader_pump.cancel()
+                writer_pump.cancel()
+                results = await asyncio.gather(reader_pump, writer_pump, return_exceptions=True)
+                for result in results:
+                    if isinstance(result, Exception):
+                        client.log.error("client handling error: %r", result)
+                while not replies.empty():
+                    item = replies.get_nowait()
+                    if item is not None:
+                        item[0].cancel()
+
+    async def _client_reader_pump(self, client, replies):
+        # Bound once per client instead of looked up on every request
+        read, put = client.read, replies.put
+        transform, submit = self._transform_request, self._submit
+        keep_tid = self.modbus_type == "tcp"
+        while True:
+            request = await read()
+            if not request:
+                await put(None)
+                return
+
+            # Detect client request format (TCP vs RTU over TCP)
+            is_tcp_request = len(request) >= 6 and _MBAP_LEN.unpack_from(request, 2)[0] == 0
+            client_format = "TCP" if is_tcp_request else "RTU over TCP"
+
+            # Log proxy activity overview
+            if self._debug:
+                self.log.debug(self._proxy_fmt, client.client_ip, client.client_port, client.request_count, client_format)
+
+            # Without remapping, frames the device can take as they are
+            # need no transform in either direction
+            passthrough = not self._remapping and client_format == self._device_format
+            if not passthrough:
+                request = transform(request, client_format)
+            # The device side swaps in its own transaction ID: keep the client's
+            client_tid = bytes(request[:2]) if keep_tid else None
+            await put((submit(request), request, client_tid, client_format, passthrough))
+
+    async def _client_writer_pump(self, client, replies, attempts=2):
+        get, queue, flush = replies.get, client.queue, client.flush
+        transform, submit = self._transform_reply, self._submit
+        while True:
+            item = await get()
+            if item is None:
+                await flush()
+                return
+            future, request, client_tid, client_format, passthrough = item
+            if not future.done() and not await flush():
+                # Write out the replies already queued before waiting
+                return
+            reply = None
+            for i in range(attempts):
+                if i:
+                    future = submit(request)
+                try:
+                    reply = await future
                     break
+                except Exception as error:
+                    self.log.error(
+                        "write_read error [%s/%s]: %r", i + 1, attempts, error
+                    )
+            if not reply:
+                await flush()
+                return
+            if client_tid is not None:
+                reply[:2] = client_tid
+            if not passthrough:
+                reply = transform(reply, client_format)
+            queue(reply)
+            if replies.empty() and not await flush():
+                return
 
     async def start(self):
+        if self.modbus_type == "rtu":
+            try:
+                self._validate_device()
+            except (OSError, ValueError):
+                # Not fatal: already logged, open() checks again when connecting
+                pass
+        else:
+            try:
+                await self._resolve()
+            except OSError as error:
+                # Not fatal: open() retries the lookup when connecting
+                self.log.warning("could not resolve %s: %r", self.modbus_host, error)
         self.server = await asyncio.start_server(
             self.handle_client, self.host, self.port, start_serving=True
         )
@@ -819,6 +1349,13 @@ class ModBus(Connection):
         if self.server is not None:
             self.server.close()
             await self.server.wait_closed()
+        task, self._worker_task = self._worker_task, None
+        if task is not None:
+            task.cancel()
+        while not self._submit_q.empty():
+            data, target = self._submit_q.get_nowait()
+            if data is not None and not target.done():
+                target.set_exception(ConnectionError("proxy stopped"))
         await self.close()
 
     async def serve_forever(self):
@@ -892,10 +1429,18 @@ def parse_args(args=None):
         default=10,
         help="modbus connection and request timeout in seconds",
     )
+    parser.add_argument(
+        "--loop",
+        choices=["auto", "asyncio", "uvloop"],
+        default="auto",
+        help="event loop implementation (auto: uvloop if installed)",
+    )
     options = parser.parse_args(args=args)
 
     if not options.config_file and not options.modbus:
         parser.exit(1, "must give a config-file or/and a --modbus")
+    if options.loop == "uvloop" and importlib.util.find_spec("uvloop") is None:
+        parser.exit(1, "--loop=uvloop requires the uvloop package")
     return options
 
 
@@ -948,9 +1493,24 @@ async def run(args=None, ready=None):
     await run_bridges(bridges, ready=ready)
 
 
+def event_loop_factory(name):
+    if name == "auto":
+        try:
+            import uvloop
+        except ImportError:
+            return None
+        return uvloop.new_event_loop
+    if name == "uvloop":
+        import uvloop
+        return uvloop.new_event_loop
+    return None
+
+
 def main():
+    loop_factory = event_loop_factory(parse_args().loop)
     try:
-        asyncio.run(run())
+        with asyncio.Runner(loop_factory=loop_factory) as runner:
+            runner.run(run())
     except KeyboardInterrupt:
         log.warning("Ctrl-C pressed. Bailing out!")
 
@@ -0,0 +1,5 @@
+import pathlib
+import sys
+
+# The proxy is a single script, not an installed package
+sys.path.insert(0, str(pathlib.Path(__file__).parent.parent / "src"))
@@ -0,0 +1,116 @@
+import asyncio
+import struct
+
+import pytest
+
+from modbus_proxy import ModbusProtocol, _MAX_ADU
+
+
+class FakeTransport:
+    def __init__(self):
+        self.aborted = False
+
+    def abort(self):
+        self.aborted = True
+
+    def is_closing(self):
+        return self.aborted
+
+
+def frame(tid, pdu, uid=1):
+    return struct.pack(">HHHB", tid, 0, len(pdu) + 1, uid) + pdu
+
+
+def feed(protocol, data, chunk=None):
+    """Deliver data the way the event loop does, chunk bytes at a time"""
+    while data:
+        buf = protocol.get_buffer(-1)
+        size = min(len(buf), len(data), chunk or len(data))
+        buf[:size] = data[:size]
+        protocol.buffer_updated(size)
+        data = data[size:]
+
+
+def make_protocol():
+    protocol = ModbusProtocol()
+    protocol.connection_made(FakeTransport())
+    return protocol
+
+
+def test_split_frame():
+    async def main():
+        protocol = make_protocol()
+        data = frame(7, bytes([3, 2, 0x12, 0x34]))
+        read = asyncio.create_task(protocol.read_frame())
+        feed(protocol, data[:-1], chunk=1)
+        await asyncio.sleep(0)
+        assert not read.done()
+        feed(protocol, data[-1:])
+        assert await read == data
+
+    asyncio.run(main())
+
+
+def test_frames_split_across_buffer_refills():
+    async def main():
+        protocol = make_protocol()
+        frames = [frame(tid, bytes([3, 251]) + bytes(251)) for tid in range(10)]
+        assert len(frames[0]) == _MAX_ADU
+        feed(protocol, b"".join(frames), chunk=100)
+        for expected in frames:
+            assert await protocol.read_frame() == expected
+
+    asyncio.run(main())
+
+
+def test_several_frames_in_one_read():
+    async def main():
+        protocol = make_protocol()
+        frames = [frame(tid, bytes([3, 2, 0, tid])) for tid in range(3)]
+        feed(protocol, b"".join(frames))
+        for expected in frames:
+            assert await protocol.read_frame() == expected
+
+    asyncio.run(main())
+
+
+@pytest.mark.parametrize("size", [0, 1, _MAX_ADU - 5, 0xFFFF])
+def test_invalid_length_aborts(size):
+    async def main():
+        protocol = make_protocol()
+        feed(protocol, struct.pack(">HHH", 1, 0, size) + bytes(4))
+        assert protocol.transport.aborted
+        with pytest.raises(ValueError, match="invalid MBAP length"):
+            await protocol.read_frame()
+
+    asyncio.run(main())
+
+
+def test_eof_on_partial_frame():
+    async def main():
+        protocol = make_protocol()
+        data = frame(1, bytes([3, 2, 0, 1]))
+        feed(protocol, data[:8])
+        protocol.eof_received()
+        with pytest.raises(asyncio.IncompleteReadError) as info:
+            await protocol.read_frame()
+        assert info.value.partial == data[:8]
+        assert info.value.expected == len(data)
+
+    asyncio.run(main())
+
+
+def test_eof_after_complete_frames():
+    async def main():
+        protocol = make_protocol()
+        data = frame(1, bytes([6, 0, 1, 0, 2]))
+        feed(protocol, data)
+        protocol.eof_received()
+        assert not protocol.at_eof()
+        assert await protocol.read_frame() == data
+        assert protocol.at_eof()
+        with pytest.raises(asyncio.IncompleteReadError) as info:
+            await protocol.read_frame()
+        assert info.value.partial == b""
+
+    asyncio.run(main())